@@ -0,0 +1,39 @@
+/*
+ * Batched wrapper around the NE2001 dmdsm routine.
+ *
+ * Calling dmdsm_ once per source through ctypes means paying the cost of
+ * converting every argument for every source. Looping in C instead means
+ * Python only has to cross into the library once per population.
+ *
+ * Note dmdsm keeps internal state (save/common blocks), so the loop is
+ * deliberately kept serial.
+ */
+#include <stddef.h>
+
+extern void dmdsm_(float *l, float *b, int *ndir, float *dmpsr, float *dist,
+                   char *limit, float *sm, float *smtau, float *smtheta,
+                   float *smiso, char *ip, int *lip,
+                   size_t len_limit, size_t len_ip);
+
+void dmdsm_batch(const float *dist, const float *gl, const float *gb, int n,
+                 char *inpath, int linpath, float *sm_out, float *smtau_out)
+{
+    int i;
+    int ndir = -1;
+    int lip = linpath;
+    char limit = ' ';
+    float l, b, d, dmpsr, smtheta, smiso;
+
+    /* Galactic coordinates are expected to be given in radians */
+    for (i = 0; i < n; i++) {
+        l = gl[i];
+        b = gb[i];
+        d = dist[i];
+        dmpsr = 0.f;
+        smtheta = 0.f;
+        smiso = 0.f;
+
+        dmdsm_(&l, &b, &ndir, &dmpsr, &d, &limit, &sm_out[i], &smtau_out[i],
+               &smtheta, &smiso, inpath, &lip, 1, (size_t) linpath);
+    }
+}
@@ -288,15 +288,19 @@ class Frbcat():
                 df['raj'] = df['raj'] + ':00'
 
             ra, dec = go.frac_deg(df['raj'], df['decj'])
-            gl, gb = go.radec_to_lb(ra, dec, frac=True)
             df['ra'] = ra
             df['dec'] = dec
-            df['gl'] = gl
-            df['gb'] = gb
             return df
 
         self.df = self.df.apply(trans, axis=1)
 
+        # Convert all coordinates in one go
+        ra = self.df['ra'].values
+        dec = self.df['dec'].values
+        gl, gb = go.radec_to_lb_vec(ra, dec)
+        self.df['gl'] = gl
+        self.df['gb'] = gb
+
     def match_surveys(self, interrupt=True):
         """Match up frbs with surveys."""
         # Merge survey names
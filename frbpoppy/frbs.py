@@ -1,4 +1,5 @@
 """Class to hold FRB source properties."""
+import copy
 import numpy as np
 import pandas as pd
 
@@ -53,13 +54,39 @@ class FRBs:
             if type(parm) is np.ndarray:
                 setattr(self, attr, parm[mask])
 
+    def copy(self, mutates=()):
+        """Copy FRB properties, sharing all arrays which won't be modified.
+
+        Only the parameters listed in ``mutates`` are copied, all other arrays
+        are shared with the original. Shared arrays should therefore only be
+        replaced (as done by ``apply``), never modified in place.
+
+        Args:
+            mutates (tuple): Names of parameters which will be modified in
+                place, and therefore need their own copy.
+
+        Returns:
+            FRBs: Copy of the FRB properties.
+
+        """
+        frbs = copy.copy(self)
+        for attr in mutates:
+            parm = getattr(self, attr)
+            if type(parm) is np.ndarray:
+                setattr(frbs, attr, np.copy(parm))
+
+        return frbs
+
     def to_df(self):
         """Convert properties over to a Pandas DataFrame."""
         # Find all source properties
-        df = pd.DataFrame()
+        data = {}
         for attr in self.__dict__.keys():
             parm = getattr(self, attr)
             if type(parm) is np.ndarray:
-                df[attr] = parm
+                data[attr] = parm
+
+        # Build the frame in one go rather than inserting column by column
+        df = pd.DataFrame(data, columns=list(data))
 
         return df
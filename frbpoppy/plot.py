@@ -303,19 +303,19 @@ class Plot():
                     df = df.replace('None', np.nan)
                     df = df.dropna()
 
-                # Update data
+                # Update data, handing Bokeh plain arrays rather than Series
                 if tab.name == 'Scatter':
-                    source.data = dict(x=df[x_abr],
-                                       y=df[y_abr],
-                                       color=df['color'],
-                                       population=df['population'])
+                    source.data = dict(x=df[x_abr].values,
+                                       y=df[y_abr].values,
+                                       color=df['color'].values,
+                                       population=df['population'].values)
                 else:
-                    source.data = dict(top=df[x_abr],
-                                       left=df[f'{x_abr}_left'],
-                                       right=df[f'{x_abr}_right'],
-                                       bottom=df['bottom'],
-                                       color=df['color'],
-                                       population=df['population']
+                    source.data = dict(top=df[x_abr].values,
+                                       left=df[f'{x_abr}_left'].values,
+                                       right=df[f'{x_abr}_right'].values,
+                                       bottom=df['bottom'].values,
+                                       color=df['color'].values,
+                                       population=df['population'].values
                                        )
 
     def set_layout(self):
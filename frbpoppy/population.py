@@ -11,7 +11,12 @@ from frbpoppy.frbs import FRBs
 
 
 class Population:
-    """Class to hold a population of FRBs."""
+    """Class to hold a population of FRBs.
+
+    Populations derived from another population (e.g. a SurveyPopulation)
+    share the source arrays they don't modify with their parent. Arrays in
+    ``frbs`` should therefore be replaced rather than changed in place.
+    """
 
     def __init__(self):
         """Initializing."""
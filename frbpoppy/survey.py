@@ -99,7 +99,7 @@ class Survey:
         mask = np.ones_like(frbs.ra, dtype=bool)
 
         # Ensure in correct format
-        frbs.gl[frbs.gl > 180.] -= 360.
+        frbs.gl = np.where(frbs.gl > 180., frbs.gl - 360., frbs.gl)
 
         # Create region masks
         gl_limits = (frbs.gl > self.gl_max) | (frbs.gl < self.gl_min)
@@ -148,16 +148,18 @@ class Survey:
 
         return 2/self.fwhm * 60*180/math.pi * arcsin
 
-    def intensity_profile(self, n_gen=1, dimensions=2):
+    def intensity_profile(self, n_gen=1, dimensions=2, rng=None):
         """Calculate intensity profile."""
+        rng = go.default_rng(rng)
+
         # Calculate Full Width Half Maximum from beamsize
         self.fwhm = 2*math.sqrt(self.beam_size_fwhm/math.pi) * 60  # [arcmin]
         offset = self.fwhm/2  # Radius = diameter/2.
 
         if dimensions == 2:  # 2D
-            offset *= np.sqrt(np.random.random(n_gen))
+            offset *= np.sqrt(rng.random(n_gen))
         elif dimensions == 1:  # 1D
-            offset *= np.random.random(n_gen)
+            offset *= rng.random(n_gen)
 
         # Allow for a perfect beam pattern in which all is detected
         if self.gain_pattern == 'perfect':
@@ -199,8 +201,8 @@ class Survey:
             place = paths.models() + f'/beams/{self.gain_pattern}.npy'
             beam_array = np.load(place)
             shape = beam_array.shape
-            ran_x = np.random.randint(0, shape[0], n_gen)
-            ran_y = np.random.randint(0, shape[1], n_gen)
+            ran_x = rng.integers(0, shape[0], n_gen)
+            ran_y = rng.integers(0, shape[1], n_gen)
             int_pro = beam_array[ran_x, ran_y]
             offset = np.sqrt((ran_x-shape[0]/2)**2 + (ran_y-shape[1]/2)**2)
 
@@ -235,20 +237,22 @@ class Survey:
         t_dm = 8.297616e6 * self.bw_chan * frbs.dm * (self.central_freq)**-3
         return t_dm
 
-    def calc_scat(self, dm):
+    def calc_scat(self, dm, rng=None):
         """Calculate scattering timescale for FRBs.
 
         Offset according to Lorimer et al. (doi:10.1093/mnrasl/slt098)
 
         Args:
             dm (array): Dispersion Measure
+            rng (Generator, optional): Random number generator
 
         Returns:
             array: Scattering timescales [ms]
 
         """
         freq = self.central_freq
-        t_scat = go.scatter_bhat(dm, scindex=-3.86, offset=-9.5, freq=freq)
+        t_scat = go.scatter_bhat(dm, scindex=-3.86, offset=-9.5, freq=freq,
+                                 rng=rng)
         return t_scat
 
     def calc_Ts(self, frbs):
@@ -289,7 +293,7 @@ class Survey:
         i = nl / 4.
 
         index = 180*i.astype(int) + j.astype(int)
-        T_sky_haslam = np.take(T_sky_list, index)
+        T_sky_haslam = T_sky_list[index]
 
         # scale temperature
         # Assuming dominated by syncrotron radiation
@@ -323,15 +327,15 @@ class Survey:
         sp = frbs.si + 1
         sm = frbs.si - 1
 
-        # Convert distance in Gpc to metres
-        dist = frbs.dist_co * 1e9 * 3.0856775814913673 * 1e16
+        # Convert distance in Gpc to metres (in a single pass over the array)
+        dist = frbs.dist_co * (1e9 * 3.0856775814913673e16)
 
         # Convert luminosity to Watts
         lum = frbs.lum_bol * 1e-7
 
         freq_frac = (f_2**sp - f_1**sp) / (f_2 - f_1)
         nom = lum * (1+frbs.z)**sm * freq_frac
-        den = 4*np.pi*dist**2 * (f_high**sp - f_low**sp)
+        den = 4*np.pi*dist*dist * (f_high**sp - f_low**sp)
         s_peak = nom/den
 
         # Convert to Janskys
@@ -382,7 +386,7 @@ class Survey:
         snr /= (frbs.T_sys * self.beta)
         return snr
 
-    def calc_scint(self, frbs):
+    def calc_scint(self, frbs, rng=None):
         """
         Calculate scintillation effect on the signal to noise ratio.
 
@@ -393,17 +397,20 @@ class Survey:
 
         Args:
             frbs (FRBs): FRBs
+            rng (Generator, optional): Random number generator
 
         Returns:
             array: Signal to noise ratio modulation factors for scintillation
 
         """
+        rng = go.default_rng(rng)
+
         # Calculate scattering
         if type(frbs.t_scat) is not np.ndarray:
-            frbs.t_scat = self.calc_scat(frbs.dm)
+            frbs.t_scat = self.calc_scat(frbs.dm, rng=rng)
 
         # Convert to seconds
-        frbs.t_scat /= 1000.
+        frbs.t_scat = frbs.t_scat / 1000.
 
         # Decorrelation bandwidth (eq. 4.39)
         decorr_bw = 1.16/(2*math.pi*frbs.t_scat)
@@ -447,7 +454,7 @@ class Survey:
         m[weak] = np.sqrt(m_diss**2 + m_riss**2 + m_diss*m_riss)
 
         # Distribute the scintillation according to gaussian distribution
-        snr = np.random.normal(frbs.snr, m*frbs.snr)
+        snr = rng.normal(frbs.snr, m*frbs.snr)
 
         return snr
 
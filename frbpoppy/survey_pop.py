@@ -1,9 +1,9 @@
 """Class to generate a survey population of FRBs."""
-from copy import deepcopy
 import math
 import random
 import numpy as np
 
+import frbpoppy.galacticops as go
 from frbpoppy.log import pprint
 from frbpoppy.population import Population
 from frbpoppy.rates import Rates, scale
@@ -13,7 +13,7 @@ class SurveyPopulation(Population):
     """Class to create a survey population of FRBs."""
 
     def __init__(self, cosmic_pop, survey, scat=False, scin=False,
-                 rate_limit=True):
+                 rate_limit=True, rng=None, keep_arrays=True):
         """
         Run a survey to detect FRB sources.
 
@@ -26,7 +26,15 @@ class SurveyPopulation(Population):
                 observations.
             rate_limit (bool, optional): Whether to limit detections by 1/(1+z)
                 due to limitation in observing time
+            rng (Generator, optional): Random number generator with which to
+                draw all random survey properties
+            keep_arrays (bool, optional): Whether to only keep detected frbs
+                in the population. Set to False if only interested in the
+                rates, in which case all frbs within the survey region are
+                kept, and the detected ones are marked by self.det_mask
         """
+        rng = go.default_rng(rng)
+
         # Set up population
         Population.__init__(self)
 
@@ -34,7 +42,9 @@ class SurveyPopulation(Population):
         self.name = survey.name
         self.time = cosmic_pop.time
         self.vol_co_max = cosmic_pop.vol_co_max
-        self.frbs = deepcopy(cosmic_pop.frbs)
+        # Arrays are only ever replaced while surveying, so can all be shared
+        # with the cosmic population
+        self.frbs = cosmic_pop.frbs.copy()
         self.rate = Rates()
 
         pprint(f'Surveying {cosmic_pop.name} with {self.name}')
@@ -51,7 +61,7 @@ class SurveyPopulation(Population):
 
         # Set scattering timescale
         if scat:
-            frbs.t_scat = survey.calc_scat(frbs.dm)
+            frbs.t_scat = survey.calc_scat(frbs.dm, rng=rng)
 
         # Calculate total temperature
         frbs.T_sky, frbs.T_sys = survey.calc_Ts(frbs)
@@ -65,7 +75,8 @@ class SurveyPopulation(Population):
         frbs.s_peak = survey.calc_s_peak(frbs, f_low=f_min, f_high=f_max)
 
         # Account for beam offset
-        int_pro, _ = survey.intensity_profile(n_gen=len(frbs.s_peak))
+        int_pro, _ = survey.intensity_profile(n_gen=len(frbs.s_peak),
+                                              rng=rng)
         frbs.s_peak *= int_pro
 
         # Calculate fluence [Jy*ms]
@@ -76,20 +87,28 @@ class SurveyPopulation(Population):
 
         # Add scintillation
         if scin:
-            frbs.snr = survey.calc_scint(frbs)
+            frbs.snr = survey.calc_scint(frbs, rng=rng)
 
         # Check whether frbs would be above detection threshold
         snr_mask = (frbs.snr >= survey.snr_limit)
-        frbs.apply(snr_mask)
         self.rate.faint = np.size(snr_mask) - np.count_nonzero(snr_mask)
+        det_mask = snr_mask
 
         if rate_limit is True:
             limit = 1/(1+frbs.z)
-            rate_mask = np.random.random(len(frbs.z)) <= limit
-            frbs.apply(rate_mask)
-            self.rate.late = np.size(rate_mask) - np.count_nonzero(rate_mask)
+            rate_mask = rng.random(len(frbs.z)) <= limit
+            self.rate.late = np.count_nonzero(snr_mask & ~rate_mask)
+            det_mask = snr_mask & rate_mask
+
+        self.rate.det = np.count_nonzero(det_mask)
 
-        self.rate.det = len(frbs.snr)
+        # Only keep detected frbs, masking all parameters in a single pass.
+        # Otherwise keep the mask, so the detections can still be recovered
+        if keep_arrays:
+            frbs.apply(det_mask)
+            self.det_mask = None
+        else:
+            self.det_mask = det_mask
 
         # Calculate scaling factors for rates
         area_sky = 4*math.pi*(180/math.pi)**2   # In sq. degrees
@@ -117,9 +136,11 @@ class SurveyPopulation(Population):
     def calc_logn_logs(self, parameter='fluence', min_p=None, max_p=None):
         """TODO. Currently unfinished."""
         parms = getattr(self.frbs, parameter)
+        if self.det_mask is not None:
+            parms = parms[self.det_mask]
 
         if min_p is None:
-            f_0 = min(parms)
+            f_0 = parms.min()
         else:
             f_0 = min_p
             parms = parms[parms >= min_p]
@@ -128,7 +149,7 @@ class SurveyPopulation(Population):
             parms = parms[parms <= max_p]
 
         n = len(parms)
-        alpha = -1/((1/n)*sum([math.log(f/f_0) for f in parms]))
+        alpha = -1/np.log(parms/f_0).mean()
         alpha *= (n-1)/n  # Removing bias in alpha
         alpha_err = n*alpha/((n-1)*(n-2)**0.5)
         norm = n / (f_0**alpha)  # Normalisation at lowest parameter
@@ -38,6 +38,25 @@ class PostDevelopCommand(develop):
 
             check_call(to_o)
 
+        # Compile C wrapper allowing batched calls to NE2001
+        all_c = glob.glob(loc('./data/models/dm/*.c'))
+
+        for f in all_c:
+
+            folder = '/'.join(f.split('/')[:-1]) + '/'
+            c_file = f.split('/')[-1].split('.')[0]
+
+            to_o = ['gcc',
+                    '-O2',
+                    '-fPIC',
+                    '-c',
+                    f,
+                    '-o',
+                    folder + c_file + '.o',
+                    ]
+
+            check_call(to_o)
+
         if os.name == 'mac':  # Mac
             flag = '-dynamiclib'
         if os.name == 'nt':  # Windows
@@ -58,6 +77,7 @@ class PostDevelopCommand(develop):
               loc('./data/models/dm/calc_xyz.o'),
               loc('./data/models/dm/density.o'),
               loc('./data/models/dm/glun.o'),
+              loc('./data/models/dm/ne2001_batch.o'),
               ]
 
         check_call(gf)
@@ -77,7 +97,7 @@ setup(name='frbpoppy',
       zip_safe=False,
       python_requires='>=3.0',
       install_requires=['bokeh == 0.12.14',
-                        'numpy >= 1.13.0',
+                        'numpy >= 1.17.0',
                         'pandas >= 0.17.1',
                         'scipy >= 0.18.1',
                         'SQLAlchemy >= 1.1.14'],
@@ -5,7 +5,7 @@ from matplotlib.patches import Patch
 import numpy as np
 
 from rates_toy import toy_rates
-from rates_real import real_rates
+from rates_real import real_rates, rates_by_survey
 from rates_simple import simple_rates
 from rates_complex import complex_rates
 
@@ -131,7 +131,7 @@ def main():
                             size=SIZE,
                             surveys=SURVEYS)
 
-    real = real_rates(surveys=SURVEYS)
+    real = rates_by_survey(real_rates(surveys=SURVEYS))
 
     plot(toy, simple, complex, real)
 
@@ -1,22 +1,42 @@
 """Calculate the real frb detection rates."""
-from scipy.stats import chi2, norm
-from scipy.integrate import quad
-import matplotlib.pyplot as plt
+from functools import lru_cache
+from scipy import special
 import numpy as np
 
-EXPECTED = {'htru': [9, 24 * 0.551 / 1549],  # N_frbs, scaling to get frbs/day
-            'apertif': [1, 1 / 7],
-            'askap-fly': [20, 24 / 32840 * 8],
-            'utmost': [0, 0],
-            'chime': [0, 0],
-            'palfa': [1, 1 / 24.1],
-            'guppi': [0.4, 1 / 81]  # 0.4 is my own assumption
-            }
+# Expected number of frbs per survey, and scaling to get frbs/day
+SURVEY_INDEX = {'htru': 0,
+                'apertif': 1,
+                'askap-fly': 2,
+                'utmost': 3,
+                'chime': 4,
+                'palfa': 5,
+                'guppi': 6}
+EXP_N = np.array([9, 1, 20, 0, 0, 1, 0.4])  # 0.4 for guppi is my assumption
+EXP_SCALE = np.array([24 * 0.551 / 1549,
+                      1 / 7,
+                      24 / 32840 * 8,
+                      0,
+                      0,
+                      1 / 24.1,
+                      1 / 81])
+
+# Normalisation to scale all rates by HTRU
+HTRU_NORM = 1 / (EXP_N[SURVEY_INDEX['htru']] * EXP_SCALE[SURVEY_INDEX['htru']])
 
 SURVEYS = ('palfa', 'htru', 'askap-fly')
-ALPHAS = np.around(np.linspace(-0.2, -2.5, 7), decimals=2)
+ALPHAS = np.around(np.linspace(-0.2, -2.5, 7, dtype=np.float32), decimals=2)
+LEFT = float(ALPHAS.min())
+RIGHT = float(ALPHAS.max())
+X_BOX = [LEFT, RIGHT, RIGHT, LEFT]
 
+# Layout of the rates returned by real_rates
+RATES_DTYPE = [('survey', 'U16'),
+               ('exp', 'f4'),
+               ('exp_min', 'f4'),
+               ('exp_max', 'f4')]
 
+
+@lru_cache(maxsize=None)
 def poisson_interval(k, sigma=1):
     """
     Use chi-squared info to get the poisson interval.
@@ -26,58 +46,93 @@ def poisson_interval(k, sigma=1):
 
     Based off https://stackoverflow.com/questions/14813530/
     poisson-confidence-interval-with-numpy
+
+    Results are cached, so k and sigma need to be hashable scalars.
     """
-    gauss = norm(0, 1).pdf
-    a = 1 - quad(gauss, -sigma, sigma, limit=1000)[0]
-    low, high = (chi2.ppf(a/2, 2*k) / 2, chi2.ppf(1-a/2, 2*k + 2) / 2)
+    # Probability of falling outside of sigma for a standard normal
+    a = 2 * special.ndtr(-sigma)
+    # Equivalent to chi2.ppf(p, 2*k)/2, without the scipy.stats overhead.
+    # Both bounds are calculated in a single call
+    low, high = special.gammaincinv([k, k+1], [a/2, 1-a/2])
     if k == 0:
         low = 0.0
 
-    return low, high
+    # Plain floats, so cached results can be used from any scalar code
+    return float(low), float(high)
 
 
-def real_rates(surveys=SURVEYS):
-    """Calculate the EXPECTED rates (all scaled by HTRU)."""
-    rates = {}
+# Poisson intervals of the expected number of detections, as used in real_rates
+POISSON_TABLE = {(k, 2): poisson_interval(k, sigma=2)
+                 for k in set(EXP_N.tolist())}
 
-    for surv in surveys:
-        # Plot EXPECTED rate
-        exp_n = EXPECTED[surv][0]
-        exp_scaling = EXPECTED[surv][1]
 
-        norm = 1 / (EXPECTED['htru'][0] * EXPECTED['htru'][1])
-
-        exp_min, exp_max = poisson_interval(exp_n, sigma=2)
+def real_rates(surveys=SURVEYS):
+    """
+    Calculate the expected rates (all scaled by HTRU).
 
-        exp = exp_n * exp_scaling * norm
-        exp_min *= exp_scaling * norm
-        exp_max *= exp_scaling * norm
+    Returns:
+        recarray: Survey name, expected rate and its minimum and maximum
+            (see RATES_DTYPE), with one row per survey
 
-        rates[surv] = (exp, exp_min, exp_max)
+    """
+    idx = [SURVEY_INDEX[s] for s in surveys]
+    exp_n = EXP_N[idx]
+    exp_scaling = EXP_SCALE[idx]
+
+    # Look up the precomputed Poisson intervals
+    intervals = np.array([POISSON_TABLE[(k, 2)] for k in exp_n])
+    exp_min = intervals[:, 0]
+    exp_max = intervals[:, 1]
+
+    exp = exp_n * exp_scaling * HTRU_NORM
+    exp_min *= exp_scaling * HTRU_NORM
+    exp_max *= exp_scaling * HTRU_NORM
+
+    # Only used for plotting, for which single precision is plenty
+    rates = np.recarray(len(surveys), dtype=RATES_DTYPE)
+    rates.survey = surveys
+    rates.exp = exp
+    rates.exp_min = exp_min
+    rates.exp_max = exp_max
 
     return rates
 
 
+def rates_by_survey(rates):
+    """Convert rates from real_rates to {survey: (exp, exp_min, exp_max)}."""
+    return {r.survey: (r.exp, r.exp_min, r.exp_max) for r in rates}
+
+
 def main():
+    # Only import matplotlib when plotting, so real_rates can be imported
+    # without it
+    import matplotlib.pyplot as plt
+    from matplotlib.collections import PolyCollection
 
     rates = real_rates()
 
-    for surv in rates:
-        middle, top, bottom = rates[surv]
-        left = min(ALPHAS)
-        right = max(ALPHAS)
-        x = [left, right, right, left]
-        y = [top, top, bottom, bottom]
-        plt.fill(x, y, alpha=0.25)
-        plt.plot([left, right], [middle]*2, label=surv, linestyle='dashed')
-
-        plt.xlabel(r'$\alpha$')
-        plt.ylabel(r'Events / htru')
-        plt.yscale('log')
-        plt.legend()
-        plt.gca().invert_xaxis()
-        plt.tight_layout()
-        plt.savefig('./plots/real_rates.pdf')
+    plt.xlabel(r'$\alpha$')
+    plt.ylabel(r'Events / htru')
+    plt.yscale('log')
+    plt.gca().invert_xaxis()
+
+    # Draw all survey bands as one collection, coloured to match the lines
+    n = len(rates)
+    colours = ['C{}'.format(i) for i in range(n)]
+    verts = np.empty((n, 4, 2))
+    verts[:, :, 0] = X_BOX
+    verts[:, :2, 1] = rates.exp_min[:, None]
+    verts[:, 2:, 1] = rates.exp_max[:, None]
+    bands = PolyCollection(verts, facecolors=colours, alpha=0.25)
+    plt.gca().add_collection(bands)
+
+    # A 2D y-array gives one dashed line per survey in a single call
+    lines = plt.plot([LEFT, RIGHT], np.tile(rates.exp, (2, 1)),
+                     linestyle='dashed')
+
+    plt.legend(lines, rates.survey)
+    plt.tight_layout()
+    plt.savefig('./plots/real_rates.pdf')
 
 
 if __name__ == '__main__':